@@ -5,10 +5,11 @@ Telegram bot for Keepers Team application processing.
 This script implements a Telegram bot that automates the intake and moderation of
 applications from users wishing to join the Keepers Team. It does not rely on
 the python-telegram-bot library; instead, it communicates with the Telegram
-Bot API directly using HTTP requests. The bot supports long polling and
-handles the full application flow, including user questionnaire, preview of
-answers, confirmation, forwarding to a moderator chat, and moderator actions
-to accept or reject the application with a reason.
+Bot API directly over HTTP using asyncio and aiohttp, so updates are handled
+concurrently. The bot supports long polling as well as webhooks and handles
+the full application flow, including user questionnaire, preview of answers,
+confirmation, forwarding to a moderator chat, and moderator actions to accept
+or reject the application with a reason.
 
 Required environment variables:
 
@@ -19,22 +20,45 @@ Required environment variables:
   CHANNEL_INVITE_LINK:  Invite link to the private channel users are granted
                         access to upon acceptance.
 
+Optional environment variables:
+
+  WEBHOOK_URL:          Public HTTPS base URL (e.g. "https://bot.example.com").
+                        When set, the bot registers a webhook at
+                        WEBHOOK_URL/<BOT_TOKEN> and serves updates over HTTP
+                        instead of long polling.
+  WEBHOOK_HOST:         Interface the webhook server listens on (default
+                        "0.0.0.0").
+  WEBHOOK_PORT:         Port the webhook server listens on (default 8080).
+
 The bot stores user state in memory only; restarting the script will reset
-active conversations. The bot uses HTML parse_mode for formatting messages.
+active conversations. A user's state is also dropped a day after they send
+/start, while applications still awaiting a moderator are kept. The bot uses
+HTML parse_mode for formatting messages.
 """
 
 import os
-import time
 import html
+import asyncio
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-import requests
+from typing import (
+    Awaitable, Callable, Coroutine, Deque, Dict, Final, List, MutableMapping,
+    Optional, Set, Tuple,
+)
+import aiohttp
+import orjson
+from aiohttp import web
+from cachetools import TTLCache
 
 
 # Fetch required configuration from environment variables.
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 MODERATOR_CHAT_ID = os.environ.get("MODERATOR_CHAT_ID")
 CHANNEL_INVITE_LINK = os.environ.get("CHANNEL_INVITE_LINK")
+# Without trailing slashes, so the webhook path is exactly /<BOT_TOKEN>
+WEBHOOK_URL = (os.environ.get("WEBHOOK_URL") or "").rstrip("/")
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8080"))
 
 # Validate configuration.
 if not BOT_TOKEN or not MODERATOR_CHAT_ID or not CHANNEL_INVITE_LINK:
@@ -44,22 +68,200 @@ if not BOT_TOKEN or not MODERATOR_CHAT_ID or not CHANNEL_INVITE_LINK:
 
 API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
 
+# Request bodies are pre-encoded with orjson rather than aiohttp's json=.
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Telegram lets a bot send about 20 messages per minute to the same group.
+GROUP_MESSAGES_PER_MINUTE = 20
+
+# Server-side hold time for getUpdates long polling, in seconds.
+LONG_POLL_TIMEOUT = 60
+
+# Bounds on the in-memory user state: at most this many users, each kept for
+# this many seconds after their state was created.
+USER_STATES_MAXSIZE = 50_000
+USER_STATES_TTL = 24 * 3600
+
+# Update types the bot handles, for both getUpdates and setWebhook.
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+# Inline keyboards, serialized to JSON once. "{uid}" stands for the applicant
+# id and is filled in per message by keyboard_for().
+KB_USER_CONFIRM = orjson.dumps({
+    "inline_keyboard": [[
+        {"text": "✅ Принять", "callback_data": "user_accept:{uid}"},
+        {"text": "❌ Отклонить", "callback_data": "user_decline:{uid}"},
+    ]]
+}).decode()
+KB_MOD_DECISION = orjson.dumps({
+    "inline_keyboard": [[
+        {"text": "✅ Принять", "callback_data": "mod_accept:{uid}"},
+        {"text": "❌ Отклонить", "callback_data": "mod_decline:{uid}"},
+    ]]
+}).decode()
+
+# Markup that removes all buttons from a message once a decision is made.
+EMPTY_MARKUP = orjson.Fragment('{"inline_keyboard":[]}')
+
+# Greeting sent when a user starts the questionnaire.
+GREETING_TEXT = (
+    "Приветствуем тебя! С тобой бот Keepers Team.\n\n"
+    "Мы открыли набор в нашу команду, работающую в сфере NFT-подарков через Telegram.\n"
+    "Уже сейчас ты можешь начать зарабатывать на одном из самых перспективных направлений.\n\n"
+    "🔺 Мы предлагаем одни из лучших условий на рынке:\n\n"
+    "— 60% от оценки скупа — твоя чистая прибыль.\n"
+    "Для ТОП-воркеров предусмотрен индивидуальный процент и бонусные условия.\n\n"
+    "— Пошаговые мануалы, основанные на реальном опыте.\n"
+    "Также доступны обучающие методички.\n\n"
+    "— Постоянная поддержка от ТОПОВ.\n\n"
+    "📈 Благодаря нашей системе распределения процентов ты сможешь выстроить пассивный доход без ограничений — всё зависит только от твоего желания и активности.\n\n"
+    "👥 Уже создавал или планируешь собрать собственную команду?\n"
+    "Для филиалов и опытных воркеров — особые условия сотрудничества и поддержка на старте."
+)
+
+# Questionnaire prompts, asked in order.
+QUESTIONS: Tuple[str, ...] = (
+    "Сколько вам лет?",
+    (
+        "Уже работал в этой сфере?\n"
+        "Если да — где и с каким капиталом?\n"
+        "Если нет — расскажи, в каких сферах у тебя был опыт"
+    ),
+    "Готовы ли вы вложить 10–35 $ на оплату расходников?",
+    "Ссылка на форум или источник, откуда вы о нас узнали",
+)
+NUM_QUESTIONS: Final[int] = len(QUESTIONS)
+
+# Command that starts the questionnaire, matched case-insensitively.
+CMD_START: Final[str] = "/start"
+
+# Static replies sent by the handlers.
+MSG_PROMPT_START: Final[str] = "Для подачи заявки отправьте команду /start."
+MSG_SEND_START: Final[str] = "Отправьте /start для начала анкеты."
+MSG_USE_BUTTONS: Final[str] = (
+    "Пожалуйста, используйте кнопки ниже, чтобы подтвердить или отменить заявку."
+)
+MSG_SUMMARY_FOOTER: Final[str] = "\n\nПожалуйста, убедитесь, что заявка заполнена корректно."
+MSG_SUBMITTED: Final[str] = (
+    "Ваша заявка отправлена на рассмотрение. "
+    "Ментор ответит вам, как только примет решение."
+)
+MSG_ON_HOLD: Final[str] = (
+    MSG_SUBMITTED + "\n"
+    "Повторная подача заявки разрешена только после очистки истории диалога с ботом."
+)
+MSG_CANCELLED: Final[str] = (
+    "Анкета отменена. Если хотите подать заявку заново, отправьте команду /start."
+)
+MSG_ACCEPTED: Final[str] = (
+    "🎉 <b>Удачной игры!</b>\n#blood_play 🩸🎮\n\n"
+    f"{html.escape(CHANNEL_INVITE_LINK)}"
+)
+MSG_ASK_REASON: Final[str] = "Пожалуйста, введите причину отказа:"
+DEFAULT_REASON: Final[str] = "Без объяснения причины"
+
+
+def keyboard_for(template: str, applicant_id: int) -> orjson.Fragment:
+    """Fill an applicant id into a pre-serialized keyboard template.
+
+    The result is embedded verbatim when the request body is encoded.
+    """
+    return orjson.Fragment(template.replace("{uid}", str(applicant_id)))
+
 
-def telegram_request(method: str, params: Optional[dict] = None) -> dict:
+@dataclass(slots=True)
+class SendWindow:
+    """Sliding one-minute window pacing outgoing messages to a single group chat."""
+
+    # Event loop times of the most recent sends, at most one minute's allowance
+    sent_at: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=GROUP_MESSAGES_PER_MINUTE)
+    )
+    # Serializes senders so they are admitted one at a time, in order
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Nothing may be sent before this event loop time (set on flood control)
+    blocked_until: float = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until another message may be sent without exceeding the limit."""
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            # Re-check after every sleep: a 429 may extend the block meanwhile
+            while True:
+                ready = self.blocked_until
+                if len(self.sent_at) == self.sent_at.maxlen:
+                    # The oldest of the last N sends must be a minute old
+                    ready = max(ready, self.sent_at[0] + 60)
+                delay = ready - loop.time()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.sent_at.append(loop.time())
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every sender to this chat for the given number of seconds."""
+        until = asyncio.get_running_loop().time() + seconds
+        self.blocked_until = max(self.blocked_until, until)
+
+
+async def telegram_request(
+    session: aiohttp.ClientSession,
+    method: str,
+    params: Optional[dict] = None,
+    read_timeout: float = 65,
+    window: Optional[SendWindow] = None,
+) -> dict:
     """Send a request to the Telegram Bot API and return the JSON response.
 
+    If Telegram answers with flood control (error 429), waits for the
+    ``retry_after`` it asks for and retries the request once. With a send
+    window, the wait applies to every sender to that chat.
+
     Args:
+        session: The shared aiohttp session used for all API calls.
         method: The API method (e.g. "sendMessage").
         params: A dictionary of parameters to include in the request.
+        read_timeout: Socket read timeout in seconds. For long polling this
+            must exceed the API-side ``timeout`` parameter.
+        window: Send window of the target chat, if its sends are paced.
 
     Returns:
         The parsed JSON response.
     """
+    if window:
+        await window.acquire()
+    data = await _post(session, method, params, read_timeout)
+    if data.get("error_code") == 429:
+        retry_after = data.get("parameters", {}).get("retry_after", 1)
+        print(f"Flood control on {method}, retrying in {retry_after}s")
+        if window:
+            window.block_for(retry_after)
+            await window.acquire()
+        else:
+            await asyncio.sleep(retry_after)
+        data = await _post(session, method, params, read_timeout)
+    return data
+
+
+async def _post(
+    session: aiohttp.ClientSession,
+    method: str,
+    params: Optional[dict],
+    read_timeout: float,
+) -> dict:
+    """Perform a single Bot API call; see telegram_request()."""
     url = f"{API_URL}/{method}"
     try:
-        resp = requests.post(url, data=params, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        timeout = aiohttp.ClientTimeout(sock_connect=5, sock_read=read_timeout)
+        # Send parameters as a JSON body so nested values such as reply_markup
+        # and allowed_updates are encoded correctly.
+        body = orjson.dumps(params or {})
+        async with session.post(url, data=body, headers=JSON_HEADERS, timeout=timeout) as resp:
+            # API errors such as 429 come back as JSON with a non-2xx status;
+            # only fail on the status when there is no JSON body to inspect.
+            if resp.content_type != "application/json":
+                resp.raise_for_status()
+            data = orjson.loads(await resp.read())
         if not data.get("ok"):
             # Print to stderr but continue raising an exception
             print(f"Telegram API returned an error: {data}")
@@ -70,19 +272,23 @@ def telegram_request(method: str, params: Optional[dict] = None) -> dict:
         return {"ok": False, "error": str(exc)}
 
 
-@dataclass
+@dataclass(slots=True)
 class UserState:
     """Tracks the current state of a user's application process."""
 
     step: int = 0  # Which question is being asked (1-based index). 0 means not started.
     answers: List[str] = field(default_factory=list)  # Collected answers from the user.
+    # HTML-escaped copies of answers, escaped once on receipt for the summaries
+    answers_escaped: List[str] = field(default_factory=list)
     submitted: bool = False  # Whether the application has been sent for moderation.
     awaiting_user_confirmation: bool = False  # Waiting for user to confirm the summary.
     # The message_id of the summary message sent to the user (for editing buttons, optional)
     summary_message_id: Optional[int] = None
+    # Enumerated answers text, built once and reused for the moderator message
+    summary_cached: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingApplication:
     """Represents an application awaiting moderation."""
 
@@ -98,19 +304,49 @@ class PendingApplication:
 
 
 class KeepersBot:
-    """Core bot class encapsulating the long-polling loop and handlers."""
+    """Core bot class encapsulating the update loops and handlers."""
 
     def __init__(self):
-        self.user_states: Dict[int, UserState] = {}
+        self.user_states: MutableMapping[int, UserState] = TTLCache(
+            maxsize=USER_STATES_MAXSIZE, ttl=USER_STATES_TTL
+        )
         self.pending_apps: Dict[int, PendingApplication] = {}
+        # Moderator user_id -> applicant_id whose rejection reason is awaited
+        self.awaiting_reason_by_mod: Dict[int, int] = {}
         self.last_update_id: Optional[int] = None
+        # Created in run(), since aiohttp sessions must live inside the event loop
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Group chat_id -> send window used to stay under the group send limit
+        self._send_windows: Dict[str, SendWindow] = {}
+        # Strong references to in-flight handler tasks so they are not GC'd
+        self._tasks: Set[asyncio.Task] = set()
+        # Callback data action -> handler taking (applicant_id, callback_query)
+        self._cb_handlers: Dict[str, Callable[[int, dict], Awaitable[None]]] = {
+            "user_accept": self._on_user_accept,
+            "user_decline": self._on_user_decline,
+            "mod_accept": self._on_mod_accept,
+            "mod_decline": self._on_mod_decline,
+        }
 
-    def send_message(
+    def send_window(self, chat_id: int | str) -> Optional[SendWindow]:
+        """Return the send window pacing messages to the given chat.
+
+        Only group chats (negative ids), such as the moderator chat, are paced.
+        """
+        key = str(chat_id)
+        if not key.startswith("-"):
+            return None
+        window = self._send_windows.get(key)
+        if window is None:
+            window = self._send_windows[key] = SendWindow()
+        return window
+
+    async def send_message(
         self,
         chat_id: int | str,
         text: str,
         parse_mode: str = "HTML",
-        reply_markup: Optional[dict] = None,
+        reply_markup: Optional[dict | orjson.Fragment] = None,
         disable_notification: bool = False,
     ) -> dict:
         """Helper to send a message."""
@@ -123,13 +359,15 @@ class KeepersBot:
         }
         if reply_markup:
             params["reply_markup"] = reply_markup
-        return telegram_request("sendMessage", params)
+        return await telegram_request(
+            self.session, "sendMessage", params, window=self.send_window(chat_id)
+        )
 
-    def edit_message_reply_markup(
+    async def edit_message_reply_markup(
         self,
         chat_id: int | str,
         message_id: int,
-        reply_markup: Optional[dict],
+        reply_markup: Optional[dict | orjson.Fragment],
     ) -> dict:
         """Helper to edit the reply markup of a message."""
         params = {
@@ -137,107 +375,88 @@ class KeepersBot:
             "message_id": message_id,
             "reply_markup": reply_markup,
         }
-        return telegram_request("editMessageReplyMarkup", params)
+        return await telegram_request(
+            self.session, "editMessageReplyMarkup", params, window=self.send_window(chat_id)
+        )
 
-    def answer_callback_query(self, callback_query_id: str, text: str = "") -> None:
+    async def answer_callback_query(self, callback_query_id: str, text: str = "") -> None:
         """Answer callback queries to acknowledge button presses."""
-        telegram_request(
+        await telegram_request(
+            self.session,
             "answerCallbackQuery",
             {"callback_query_id": callback_query_id, "text": text, "show_alert": False},
         )
 
-    def build_inline_keyboard(self, buttons: List[List[dict]]) -> dict:
-        """Construct an inline keyboard markup for Telegram API."""
-        return {"inline_keyboard": buttons}
+    async def get_updates(self) -> Optional[List[dict]]:
+        """Retrieve new updates from Telegram since the last processed update_id.
 
-    def get_updates(self) -> List[dict]:
-        """Retrieve new updates from Telegram since the last processed update_id."""
+        Returns None if the request failed, so the caller can back off.
+        """
         params = {
-            "timeout": 60,  # long polling timeout
-            "allowed_updates": ["message", "callback_query"],
+            "timeout": LONG_POLL_TIMEOUT,
+            "allowed_updates": ALLOWED_UPDATES,
         }
         if self.last_update_id is not None:
             params["offset"] = self.last_update_id + 1
-        resp = telegram_request("getUpdates", params)
+        # Give the socket some slack over the server-side hold time so the
+        # client never aborts a long poll that Telegram is about to answer.
+        resp = await telegram_request(
+            self.session, "getUpdates", params, read_timeout=LONG_POLL_TIMEOUT + 10
+        )
         if resp.get("ok"):
             return resp.get("result", [])
-        return []
+        return None
 
-    def start_questionnaire(self, user_id: int) -> None:
+    async def start_questionnaire(self, user_id: int) -> None:
         """Initiate questionnaire for a user."""
         state = self.user_states.setdefault(user_id, UserState())
         state.step = 1
         state.answers.clear()
+        state.answers_escaped.clear()
         state.submitted = False
         state.awaiting_user_confirmation = False
         state.summary_message_id = None
-        # Send greeting
-        greeting = (
-            "Приветствуем тебя! С тобой бот Keepers Team.\n\n"
-            "Мы открыли набор в нашу команду, работающую в сфере NFT-подарков через Telegram.\n"
-            "Уже сейчас ты можешь начать зарабатывать на одном из самых перспективных направлений.\n\n"
-            "🔺 Мы предлагаем одни из лучших условий на рынке:\n\n"
-            "— 60% от оценки скупа — твоя чистая прибыль.\n"
-            "Для ТОП-воркеров предусмотрен индивидуальный процент и бонусные условия.\n\n"
-            "— Пошаговые мануалы, основанные на реальном опыте.\n"
-            "Также доступны обучающие методички.\n\n"
-            "— Постоянная поддержка от ТОПОВ.\n\n"
-            "📈 Благодаря нашей системе распределения процентов ты сможешь выстроить пассивный доход без ограничений — всё зависит только от твоего желания и активности.\n\n"
-            "👥 Уже создавал или планируешь собрать собственную команду?\n"
-            "Для филиалов и опытных воркеров — особые условия сотрудничества и поддержка на старте."
-        )
-        # Ask first question after greeting
-        self.send_message(user_id, greeting)
-        time.sleep(0.2)  # slight delay to ensure ordering
-        self.ask_next_question(user_id)
+        state.summary_cached = None
+        # Ask first question after greeting. Awaiting the greeting first is
+        # enough to keep the two messages in order.
+        await self.send_message(user_id, GREETING_TEXT)
+        await self.ask_next_question(user_id)
 
-    def ask_next_question(self, user_id: int) -> None:
+    async def ask_next_question(self, user_id: int) -> None:
         """Send the next questionnaire question based on the user's current step."""
         state = self.user_states[user_id]
-        questions = [
-            "Сколько вам лет?",
-            (
-                "Уже работал в этой сфере?\n"
-                "Если да — где и с каким капиталом?\n"
-                "Если нет — расскажи, в каких сферах у тебя был опыт"
-            ),
-            "Готовы ли вы вложить 10–35 $ на оплату расходников?",
-            "Ссылка на форум или источник, откуда вы о нас узнали",
-        ]
-        if 1 <= state.step <= len(questions):
-            self.send_message(user_id, questions[state.step - 1])
+        if 1 <= state.step <= NUM_QUESTIONS:
+            await self.send_message(user_id, QUESTIONS[state.step - 1])
         else:
             # Out of range; ignore
             pass
 
-    def present_summary(self, user_id: int) -> None:
+    def build_summary(self, state: UserState) -> str:
+        """Return the enumerated answers text, building it on first use."""
+        if state.summary_cached is None:
+            # Build summary text with answers enumerated starting from 1
+            state.summary_cached = "\n".join(
+                f"{idx}. {escaped}"
+                for idx, escaped in enumerate(state.answers_escaped, start=1)
+            ) or "(пусто)"
+        return state.summary_cached
+
+    async def present_summary(self, user_id: int) -> None:
         """Present the filled questionnaire to the user for confirmation."""
         state = self.user_states[user_id]
-        # Build summary text with answers enumerated starting from 1
-        lines = []
-        for idx, ans in enumerate(state.answers, start=1):
-            # Escape HTML characters to prevent injection
-            escaped = html.escape(ans)
-            lines.append(f"{idx}. {escaped}")
-        summary_text = "\n".join(lines) if lines else "(пусто)"
+        summary_text = self.build_summary(state)
         # Buttons: Accept to submit, Decline to restart
-        buttons = [
-            [
-                {"text": "✅ Принять", "callback_data": f"user_accept:{user_id}"},
-                {"text": "❌ Отклонить", "callback_data": f"user_decline:{user_id}"},
-            ]
-        ]
-        reply_markup = self.build_inline_keyboard(buttons)
-        resp = self.send_message(
+        reply_markup = keyboard_for(KB_USER_CONFIRM, user_id)
+        resp = await self.send_message(
             user_id,
-            summary_text + "\n\nПожалуйста, убедитесь, что заявка заполнена корректно.",
+            summary_text + MSG_SUMMARY_FOOTER,
             reply_markup=reply_markup,
         )
         if resp.get("ok"):
             state.awaiting_user_confirmation = True
             state.summary_message_id = resp["result"]["message_id"]
 
-    def handle_user_message(self, update: dict) -> None:
+    async def handle_user_message(self, update: dict) -> None:
         """Handle a standard message from a user or moderator."""
         message = update.get("message") or update.get("edited_message")
         if not message:
@@ -249,258 +468,325 @@ class KeepersBot:
 
         # If message is from moderator chat and awaiting a reason for a user rejection
         if str(chat_id) == MODERATOR_CHAT_ID:
-            # Look for any pending application awaiting reason
-            for app in list(self.pending_apps.values()):
-                if app.awaiting_reason and app.declined_by == user_id:
-                    reason = text if text else "Без объяснения причины"
-                    # Send rejection to user
-                    rejection_text = (
-                        "🚫 <b>Ваша заявка была отклонена. Причина:</b>\n"
-                        f"{html.escape(reason)}\n\n"
-                        "Если хотите подать заявку повторно, удалите переписку с ботом и начните сначала.\n"
-                        "(Если бот не отвечает — убедитесь, что он не в чёрном списке.)"
-                    )
-                    self.send_message(app.user_id, rejection_text)
-                    # Mark as not pending
-                    self.pending_apps.pop(app.user_id, None)
-                    # Edit moderator message to remove buttons
-                    if app.moderator_message_id:
-                        self.edit_message_reply_markup(
-                            MODERATOR_CHAT_ID,
-                            app.moderator_message_id,
-                            reply_markup={"inline_keyboard": []},
-                        )
-                    # Notify moderator
-                    self.send_message(
+            # Look up the application this moderator is declining, if any
+            applicant_id = self.awaiting_reason_by_mod.pop(user_id, None)
+            app = self.pending_apps.get(applicant_id) if applicant_id is not None else None
+            if not app or not app.awaiting_reason or app.declined_by != user_id:
+                # If no application awaiting reason, ignore moderator chat messages
+                return
+            # Mark as not pending before awaiting, so a concurrent
+            # message from the same moderator cannot reject it twice
+            self.pending_apps.pop(applicant_id, None)
+            reason = text if text else DEFAULT_REASON
+            # Send rejection to user
+            rejection_text = (
+                "🚫 <b>Ваша заявка была отклонена. Причина:</b>\n"
+                f"{html.escape(reason)}\n\n"
+                "Если хотите подать заявку повторно, удалите переписку с ботом и начните сначала.\n"
+                "(Если бот не отвечает — убедитесь, что он не в чёрном списке.)"
+            )
+            calls = [
+                self.send_message(app.user_id, rejection_text),
+                # Notify moderator
+                self.send_message(
+                    MODERATOR_CHAT_ID,
+                    f"Заявка пользователя @{app.username or 'user'+str(app.user_id)} отклонена.",
+                ),
+            ]
+            # Edit moderator message to remove buttons
+            if app.moderator_message_id:
+                calls.append(
+                    self.edit_message_reply_markup(
                         MODERATOR_CHAT_ID,
-                        f"Заявка пользователя @{app.username or 'user'+str(app.user_id)} отклонена.",
+                        app.moderator_message_id,
+                        reply_markup=EMPTY_MARKUP,
                     )
-                    return
-
-            # If no application awaiting reason, ignore moderator chat messages
+                )
+            # The calls are independent, so issue them concurrently
+            await asyncio.gather(*calls)
             return
 
         # Non-moderator chat message: treat as applicant
         # Initialize state if not exists
         state = self.user_states.get(user_id)
+        if not state and user_id in self.pending_apps:
+            # The state expired while the application still awaits a moderator;
+            # it must not be possible to submit a second one
+            await self.send_message(chat_id, MSG_ON_HOLD)
+            return
         if not state:
-            # If message is /start
-            if text.lower() == "/start":
-                self.start_questionnaire(user_id)
+            # If message is /start. Only lowercase one character past the command:
+            # that still rejects longer texts without lowercasing all of them.
+            if text[:len(CMD_START) + 1].lower() == CMD_START:
+                await self.start_questionnaire(user_id)
             else:
                 # Prompt to start
-                self.send_message(
-                    chat_id,
-                    "Для подачи заявки отправьте команду /start.",
-                )
+                await self.send_message(chat_id, MSG_PROMPT_START)
             return
 
         # If user already submitted and not awaiting new application
         if state.submitted:
             # Always respond with on hold message
-            self.send_message(
-                chat_id,
-                "Ваша заявка отправлена на рассмотрение. "
-                "Ментор ответит вам, как только примет решение.\n"
-                "Повторная подача заявки разрешена только после очистки истории диалога с ботом.",
-            )
+            await self.send_message(chat_id, MSG_ON_HOLD)
             return
 
         # If waiting for user confirmation and user sends something other than buttons
         if state.awaiting_user_confirmation:
             # Instruct to use buttons
-            self.send_message(
-                chat_id,
-                "Пожалуйста, используйте кнопки ниже, чтобы подтвердить или отменить заявку.",
-            )
+            await self.send_message(chat_id, MSG_USE_BUTTONS)
             return
 
         # If step is in range of questions
-        if 1 <= state.step <= 4:
+        if 1 <= state.step <= NUM_QUESTIONS:
             # Save the answer
             state.answers.append(text)
+            # Escape HTML characters to prevent injection
+            state.answers_escaped.append(html.escape(text))
             state.step += 1
-            if state.step <= 4:
+            if state.step <= NUM_QUESTIONS:
                 # Ask the next question in the sequence
-                self.ask_next_question(user_id)
+                await self.ask_next_question(user_id)
             else:
                 # Completed all questions: show summary and stop further processing
-                self.present_summary(user_id)
+                await self.present_summary(user_id)
                 # Once the summary is presented we don't want to fall through and
                 # accidentally prompt the user to restart. Return early to
                 # ensure no additional messages are sent in this handler call.
                 return
         else:
-            # If step is 0 or >4 and message not recognized
+            # If step is 0 or past the last question and message not recognized
             # Do not reset the user state automatically here. Just prompt
             # them to start the questionnaire if they haven't already.
-            self.send_message(
-                chat_id,
-                "Отправьте /start для начала анкеты."
-            )
+            await self.send_message(chat_id, MSG_SEND_START)
+
+    async def handle_callback_query(self, update: dict, acknowledge: bool = True) -> None:
+        """Process callback queries from inline keyboards.
 
-    def handle_callback_query(self, update: dict) -> None:
-        """Process callback queries from inline keyboards."""
+        Pass acknowledge=False when the query has already been answered, e.g.
+        in the webhook response body.
+        """
         callback_query = update.get("callback_query")
         if not callback_query:
             return
         query_id = callback_query["id"]
         data = callback_query.get("data", "")
-        from_user = callback_query.get("from", {})
-        user_id = from_user.get("id")
 
         # Acknowledge callback to remove the loading state
-        self.answer_callback_query(query_id)
+        if acknowledge:
+            await self.answer_callback_query(query_id)
 
-        # Parse callback data
-        if data.startswith("user_accept:"):
-            try:
-                applicant_id = int(data.split(":", 1)[1])
-            except ValueError:
-                return
-            # Only handle if this is the same applicant
-            if user_id != applicant_id:
-                # Not expected: ignore silently
-                return
-            state = self.user_states.get(applicant_id)
-            if not state or state.submitted:
-                return
-            # Mark as submitted
-            state.submitted = True
-            state.awaiting_user_confirmation = False
-            # Remove buttons from user summary message
-            if state.summary_message_id:
-                self.edit_message_reply_markup(
-                    applicant_id,
-                    state.summary_message_id,
-                    reply_markup={"inline_keyboard": []},
-                )
-            # Send application to moderator chat
-            username = from_user.get("username", "")
-            lines = []
-            for idx, ans in enumerate(state.answers, start=1):
-                lines.append(f"{idx}. {html.escape(ans)}")
-            app_text = "\n".join(lines) if lines else "(пусто)"
-            message_text = (
-                f"📌 Новая заявка от @{username or 'user'+str(applicant_id)}:\n\n"
-                f"{app_text}"
-            )
-            buttons = [
-                [
-                    {"text": "✅ Принять", "callback_data": f"mod_accept:{applicant_id}"},
-                    {"text": "❌ Отклонить", "callback_data": f"mod_decline:{applicant_id}"},
-                ]
-            ]
-            reply_markup = self.build_inline_keyboard(buttons)
-            resp = self.send_message(MODERATOR_CHAT_ID, message_text, reply_markup=reply_markup)
-            mod_msg_id = resp.get("result", {}).get("message_id") if resp.get("ok") else None
-            # Track pending application
-            self.pending_apps[applicant_id] = PendingApplication(
-                user_id=applicant_id,
-                username=username or "",
-                answers=state.answers.copy(),
-                moderator_message_id=mod_msg_id,
-                awaiting_reason=False,
-            )
-            # Inform applicant that submission is sent
-            self.send_message(
+        # Parse callback data of the form "<action>:<applicant_id>"
+        action, _, arg = data.partition(":")
+        handler = self._cb_handlers.get(action)
+        if not handler:
+            return
+        try:
+            applicant_id = int(arg)
+        except ValueError:
+            return
+        await handler(applicant_id, callback_query)
+
+    async def _on_user_accept(self, applicant_id: int, callback_query: dict) -> None:
+        """Applicant confirmed their summary; forward it to the moderators."""
+        from_user = callback_query.get("from", {})
+        # Only handle if this is the same applicant
+        if from_user.get("id") != applicant_id:
+            # Not expected: ignore silently
+            return
+        state = self.user_states.get(applicant_id)
+        # Also bail out if a concurrent decline has already reset the state
+        if not state or state.submitted or not state.awaiting_user_confirmation:
+            return
+        # Mark as submitted
+        state.submitted = True
+        state.awaiting_user_confirmation = False
+        # Remove buttons from user summary message
+        if state.summary_message_id:
+            await self.edit_message_reply_markup(
                 applicant_id,
-                "Ваша заявка отправлена на рассмотрение. "
-                "Ментор ответит вам, как только примет решение."
+                state.summary_message_id,
+                reply_markup=EMPTY_MARKUP,
             )
-            return
+        # Send application to moderator chat
+        username = from_user.get("username", "")
+        app_text = self.build_summary(state)
+        message_text = (
+            f"📌 Новая заявка от @{username or 'user'+str(applicant_id)}:\n\n"
+            f"{app_text}"
+        )
+        reply_markup = keyboard_for(KB_MOD_DECISION, applicant_id)
+        resp = await self.send_message(MODERATOR_CHAT_ID, message_text, reply_markup=reply_markup)
+        mod_msg_id = resp.get("result", {}).get("message_id") if resp.get("ok") else None
+        # Track pending application
+        self.pending_apps[applicant_id] = PendingApplication(
+            user_id=applicant_id,
+            username=username or "",
+            answers=state.answers.copy(),
+            moderator_message_id=mod_msg_id,
+            awaiting_reason=False,
+        )
+        # Inform applicant that submission is sent
+        await self.send_message(applicant_id, MSG_SUBMITTED)
 
-        if data.startswith("user_decline:"):
-            # Applicant declined their own summary; reset state
-            try:
-                applicant_id = int(data.split(":", 1)[1])
-            except ValueError:
-                return
-            if user_id != applicant_id:
-                return
-            state = self.user_states.get(applicant_id)
-            if not state or state.submitted:
-                return
-            # Edit reply markup to remove buttons
-            if state.summary_message_id:
-                self.edit_message_reply_markup(
-                    applicant_id,
-                    state.summary_message_id,
-                    reply_markup={"inline_keyboard": []},
-                )
-            # Reset state to start over
-            self.user_states[applicant_id] = UserState()
-            self.send_message(
+    async def _on_user_decline(self, applicant_id: int, callback_query: dict) -> None:
+        """Applicant declined their own summary; reset state."""
+        if callback_query.get("from", {}).get("id") != applicant_id:
+            return
+        state = self.user_states.get(applicant_id)
+        if not state or state.submitted or not state.awaiting_user_confirmation:
+            return
+        # Reset state to start over before awaiting, so a concurrent accept
+        # sees the reset and does nothing
+        self.user_states[applicant_id] = UserState()
+        # Edit reply markup to remove buttons
+        if state.summary_message_id:
+            await self.edit_message_reply_markup(
                 applicant_id,
-                "Анкета отменена. Если хотите подать заявку заново, отправьте команду /start."
+                state.summary_message_id,
+                reply_markup=EMPTY_MARKUP,
             )
+        await self.send_message(applicant_id, MSG_CANCELLED)
+
+    async def _on_mod_accept(self, applicant_id: int, callback_query: dict) -> None:
+        """Moderator accepted the application; send the invite link."""
+        # Only proceed if there is a pending application. Removing it is the
+        # check itself, so a repeated click cannot accept it twice.
+        app = self.pending_apps.pop(applicant_id, None)
+        if not app:
             return
-
-        if data.startswith("mod_accept:"):
-            try:
-                applicant_id = int(data.split(":", 1)[1])
-            except ValueError:
-                return
-            # Only proceed if there is a pending application
-            app = self.pending_apps.get(applicant_id)
-            if not app:
-                return
-            # Remove pending to avoid duplicate decisions
-            self.pending_apps.pop(applicant_id, None)
-            # Edit moderator message to remove buttons
-            if app.moderator_message_id:
-                self.edit_message_reply_markup(
-                    MODERATOR_CHAT_ID,
-                    app.moderator_message_id,
-                    reply_markup={"inline_keyboard": []},
-                )
+        calls = [
             # Send acceptance message to user
-            acceptance_text = (
-                "🎉 <b>Удачной игры!</b>\n#blood_play 🩸🎮\n\n"
-                f"{html.escape(CHANNEL_INVITE_LINK)}"
-            )
-            self.send_message(applicant_id, acceptance_text)
+            self.send_message(applicant_id, MSG_ACCEPTED),
             # Notify moderator chat
             self.send_message(
                 MODERATOR_CHAT_ID,
                 f"Заявка пользователя @{app.username or 'user'+str(applicant_id)} принята."
+            ),
+        ]
+        # Edit moderator message to remove buttons
+        if app.moderator_message_id:
+            calls.append(
+                self.edit_message_reply_markup(
+                    MODERATOR_CHAT_ID,
+                    app.moderator_message_id,
+                    reply_markup=EMPTY_MARKUP,
+                )
             )
-            return
+        # The calls are independent, so issue them concurrently
+        await asyncio.gather(*calls)
 
-        if data.startswith("mod_decline:"):
-            try:
-                applicant_id = int(data.split(":", 1)[1])
-            except ValueError:
-                return
-            app = self.pending_apps.get(applicant_id)
-            if not app:
-                return
-            # Mark awaiting reason
-            app.awaiting_reason = True
-            app.declined_by = user_id
-            # Ask moderator to provide reason via next message
-            self.send_message(
-                MODERATOR_CHAT_ID,
-                "Пожалуйста, введите причину отказа:"
-            )
+    async def _on_mod_decline(self, applicant_id: int, callback_query: dict) -> None:
+        """Moderator declined the application; ask them for a reason."""
+        app = self.pending_apps.get(applicant_id)
+        if not app:
             return
+        user_id = callback_query.get("from", {}).get("id")
+        # A repeated click by the same moderator would only ask for the reason again
+        if (
+            self.awaiting_reason_by_mod.get(user_id) == applicant_id
+            and app.declined_by == user_id
+        ):
+            return
+        # A moderator is asked for one reason at a time: release the application
+        # they were previously declining so it does not wait for a lost reason
+        previous_id = self.awaiting_reason_by_mod.get(user_id)
+        previous = self.pending_apps.get(previous_id) if previous_id is not None else None
+        if previous and previous is not app and previous.declined_by == user_id:
+            previous.awaiting_reason = False
+            previous.declined_by = None
+        # Mark awaiting reason
+        app.awaiting_reason = True
+        app.declined_by = user_id
+        self.awaiting_reason_by_mod[user_id] = applicant_id
+        # Ask moderator to provide reason via next message
+        await self.send_message(MODERATOR_CHAT_ID, MSG_ASK_REASON)
+
+    async def handle_update(self, update: dict) -> None:
+        """Route a single update to the matching handler."""
+        if "message" in update or "edited_message" in update:
+            await self.handle_user_message(update)
+        elif "callback_query" in update:
+            await self.handle_callback_query(update)
+
+    def spawn(self, coro: Coroutine) -> None:
+        """Run a handler coroutine as a background task."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def dispatch(self, update: dict) -> None:
+        """Schedule an update to be handled concurrently with the others."""
+        self.spawn(self.handle_update(update))
+
+    async def handle_webhook(self, request: web.Request) -> web.Response:
+        """Receive an update pushed by Telegram and dispatch it."""
+        try:
+            update = orjson.loads(await request.read())
+        except orjson.JSONDecodeError:
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+        # Reply right away; Telegram retries deliveries that are slow to answer
+        callback_query = update.get("callback_query")
+        if callback_query:
+            # Acknowledge the button press in the response body itself, which
+            # saves a separate answerCallbackQuery round trip
+            self.spawn(self.handle_callback_query(update, acknowledge=False))
+            return web.json_response(
+                {"method": "answerCallbackQuery", "callback_query_id": callback_query["id"]}
+            )
+        self.dispatch(update)
+        return web.Response()
 
-    def run(self) -> None:
+    def open_session(self) -> aiohttp.ClientSession:
+        """Create the shared HTTP session for Telegram API calls."""
+        # Every request goes to the same host, so cache its DNS lookup well past
+        # aiohttp's 10 second default instead of re-resolving it on reconnects
+        connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def run(self) -> None:
         """Main loop: continuously poll for updates and dispatch them."""
-        print("Keepers Bot started. Waiting for updates...")
-        while True:
-            updates = self.get_updates()
-            for update in updates:
-                # Track last update id to avoid re-processing
-                self.last_update_id = update["update_id"]
-                if "message" in update or "edited_message" in update:
-                    self.handle_user_message(update)
-                elif "callback_query" in update:
-                    self.handle_callback_query(update)
-            # Throttle to avoid rapid looping in case of no updates
-            time.sleep(0.5)
+        async with self.open_session() as self.session:
+            # getUpdates is refused while a webhook is registered
+            await telegram_request(self.session, "deleteWebhook")
+            print("Keepers Bot started. Waiting for updates...")
+            while True:
+                updates = await self.get_updates()
+                if updates is None:
+                    # Back off briefly only when polling failed; a successful long
+                    # poll is re-issued immediately.
+                    await asyncio.sleep(1)
+                    continue
+                for update in updates:
+                    # Track last update id to avoid re-processing
+                    self.last_update_id = update["update_id"]
+                    self.dispatch(update)
+
+    async def run_webhook(self) -> None:
+        """Register the webhook and serve updates pushed by Telegram."""
+        async with self.open_session() as self.session:
+            app = web.Application()
+            app.router.add_post(f"/{BOT_TOKEN}", self.handle_webhook)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            try:
+                # Listen before registering, so Telegram's first deliveries
+                # do not hit a closed port and get retried with a backoff
+                await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+                resp = await telegram_request(
+                    self.session,
+                    "setWebhook",
+                    {"url": f"{WEBHOOK_URL}/{BOT_TOKEN}", "allowed_updates": ALLOWED_UPDATES},
+                )
+                if not resp.get("ok"):
+                    raise RuntimeError(f"Failed to set webhook: {resp}")
+                print(f"Keepers Bot started. Listening for webhooks on port {WEBHOOK_PORT}...")
+                await asyncio.Event().wait()
+            finally:
+                await runner.cleanup()
 
 
 if __name__ == "__main__":
     bot = KeepersBot()
-    bot.run()
+    asyncio.run(bot.run_webhook() if WEBHOOK_URL else bot.run())